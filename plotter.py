@@ -1,16 +1,33 @@
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, Input, Output, State, set_props
+from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
 from datetime import datetime
 import base64
+import binascii
+import collections
+import hashlib
 import os
-from collections import defaultdict
+import re
+import threading
 
-app = dash.Dash(__name__)
+import numpy as np
+
+# Le graphe des métriques est créé dynamiquement par update_output
+app = dash.Dash(__name__, suppress_callback_exceptions=True)
 app.title = "Drone Monitor"
 
-# Données des drones
-drones_data = {}
+# Dash sérialise les réponses des callbacks avec plotly.io.json. Les traces
+# plotly encodent déjà les tableaux NumPy en base64 (typed arrays) : le moteur
+# json standard est alors plus rapide qu'orjson, que "auto" choisirait s'il est installé
+pio.json.config.default_engine = 'json'
+
+# Figures sans trace côté serveur construites en dictionnaires : pas de validation
+# graph_objects à chaque callback, le thème est résolu une seule fois ici
+PLOTLY_WHITE = pio.templates['plotly_white'].to_plotly_json()
+EMPTY_FIGURE = {'data': [], 'layout': {}}
 
 # Dictionnaire des erreurs critiques
 ERROR_CODES = {
@@ -19,66 +36,290 @@ ERROR_CODES = {
     202: "CLK", 203: "EXTCLK", 204: "NO HW", 205: "INITFAIL",
     206: "COMMFAIL", 207: "CRASH", 255: "FATAL"
 }
+# Table de correspondance code -> code connu, indexée directement par le code.
+# Case 256 toujours fausse : avec take(mode='clip'), tout code hors 0..255 y tombe
+ERROR_LUT = np.zeros(257, dtype=bool)
+ERROR_LUT[list(ERROR_CODES)] = True
 
 # Parser le fichier .txt
 
+# Une entrée du log au format habituel, capturée en une seule passe de regex :
+# "ts,gps=..,battery=..,rssi=..,driftH=..,driftV=..,fc_error=.."
+# Les champs après gps sont optionnels ; une valeur vaut un nombre, None ou est vide.
+# L'entrée doit être reconnue en entier, jusqu'au // ou ] qui la termine
+ENTRY_RE = re.compile(
+    rb'(?:\[|//)\s*(\d+),\s*gps=\s*([^,/\]]*)'
+    rb'(?:,\s*battery=\s*([^,/\]]*))?'
+    rb'(?:,\s*rssi=\s*([^,/\]]*))?'
+    rb'(?:,\s*driftH=\s*([^,/\]]*))?'
+    rb'(?:,\s*driftV=\s*([^,/\]]*))?'
+    rb'(?:,\s*fc_error=\s*([^,/\]]*))?'
+    rb'\s*(?=//|\])'
+)
+# Clés des colonnes de métriques, dans l'ordre des groupes de ENTRY_RE
+ENTRY_KEYS = (b'gps', b'battery', b'rssi', b'driftH', b'driftV', b'fc_error')
+# Format libre : horodatage en tête d'entrée, puis paires clé=valeur dans n'importe quel ordre
+FIELD_RE = re.compile(rb'(?:\[|//)\s*(\d+)|(\w+)=\s*([^,/\]]*)')
+# Extremum comparé au seuil pour chaque métrique filtrable :
+# un drone est affiché si au moins une valeur dépasse le seuil
+THRESHOLD_STATS = {
+    'batteries': ('min', np.fmin),
+    'rssis': ('max', np.fmax),
+    'driftHs': ('max', np.fmax),
+    'driftVs': ('max', np.fmax)
+}
+
+# Partie base64 de la data-URL en octets : une seule copie (encode), la suite
+# (empreinte, décodage) travaille sur une vue mémoire sans recopier
+def _upload_payload(contents):
+    data = contents.encode('ascii')
+    return memoryview(data)[data.index(b',') + 1:]
+
+def _content_hash(payload):
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+# Les callbacks se redéclenchent à chaque changement de métrique ou de seuil
+# avec le même fichier : on garde les derniers fichiers parsés en mémoire, indexés
+# par l'empreinte seule (la chaîne base64 n'est pas conservée).
+# Les données renvoyées sont partagées entre callbacks et ne doivent pas être modifiées.
+PARSE_CACHE_SIZE = 4
+_parse_cache = collections.OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# Renvoie l'empreinte (clé du cache, gardée dans parsed-store) et les données
 def parse_uploaded_file(contents):
-    global drones_data
+    payload = _upload_payload(contents)
+    content_hash = _content_hash(payload)
+    return content_hash, _parse_payload(payload, content_hash)
+
+# Données déjà parsées pour une empreinte (parsed-store), None si sorties du cache :
+# les callbacks d'affichage n'ont pas besoin du fichier
+def _cached_parse(content_hash):
+    with _parse_cache_lock:
+        drones_data = _parse_cache.get(content_hash)
+        if drones_data is not None:
+            _parse_cache.move_to_end(content_hash)
+        return drones_data
+
+def _parse_payload(payload, content_hash):
+    drones_data = _cached_parse(content_hash)
+    if drones_data is not None:
+        return drones_data
+
+    drones_data = _parse_content(payload)
+    with _parse_cache_lock:
+        _parse_cache[content_hash] = drones_data
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return drones_data
+
+# Taille des tranches base64 décodées à la fois (multiple de 4 : pas de
+# quadruplet coupé, la data-URL ne contient ni espace ni retour à la ligne)
+DECODE_CHUNK_SIZE = 64 * 1024
+
+# Décodage par tranches. Chaque bloc ne contient que des lignes complètes : la
+# ligne en cours est gardée en morceaux et assemblée une seule fois à son \n
+# (pas de recopie à chaque tranche, une ligne contient tout le log d'un drone).
+# La mémoire reste bornée par la plus longue ligne, soit le plus gros drone
+def _iter_line_blocks(payload):
+    pending = []
+    for start in range(0, len(payload), DECODE_CHUNK_SIZE):
+        chunk = binascii.a2b_base64(payload[start:start + DECODE_CHUNK_SIZE])
+        end = chunk.rfind(b'\n') + 1
+        if not end:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:end])
+        yield b''.join(pending)
+        pending = [chunk[end:]]
+    if any(pending):
+        yield b''.join(pending)
+
+# Entrées d'une ligne : horodatages et une colonne par clé de ENTRY_KEYS,
+# valeurs manquantes (None, vide ou clé absente) converties en NaN. Le tableau
+# d'octets est élargi à 3 caractères au moins pour que b'nan' y tienne en entier.
+# None si une entrée n'a pas d'horodatage en tête (ligne rejetée)
+def _parse_entries(data):
+    # Chemin rapide : toutes les entrées sont au format habituel
+    fields = ENTRY_RE.findall(data)
+    if len(fields) == data.count(b'//') + 1:
+        fields = np.array(fields, dtype='S')
+        fields = fields.astype(np.promote_types(fields.dtype, 'S3'), copy=False)
+        fields[(fields == b'None') | (fields == b'')] = b'nan'
+        return fields[:, 0].astype(np.int64), fields[:, 1:].astype(np.float32)
+
+    # Sinon lecture par nom de clé : ordre quelconque, clés inconnues ignorées.
+    # Une entrée sans horodatage serait fusionnée avec la précédente
+    fields = np.array(FIELD_RE.findall(data), dtype='S')
+    fields = fields.astype(np.promote_types(fields.dtype, 'S3'), copy=False)
+    starts = fields[:, 0] != b''
+    if starts.sum() != data.count(b'//') + 1:
+        return None
+    entries = np.cumsum(starts) - 1
+    values = fields[:, 2]
+    values[(values == b'None') | (values == b'')] = b'nan'
+    metrics = np.full((starts.sum(), len(ENTRY_KEYS)), np.nan, dtype=np.float32)
+    for column, key in enumerate(ENTRY_KEYS):
+        selected = (fields[:, 1] == key) & (entries >= 0)
+        metrics[entries[selected], column] = values[selected].astype(np.float32)
+    return fields[starts, 0].astype(np.int64), metrics
+
+# Parse d'un bloc de lignes complètes
+def _parse_block(block):
     drones_data = {}
 
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    lines = decoded.decode('utf-8').splitlines()
-
-    for line in lines:
-        if line.strip():
-            drone_id, data = line.strip().split(' ', 1)
-            drone_id = drone_id.split('=')[1]
-            entries = data[1:-1].split('//')
-
-            timestamps, gps_statuses, batteries, rssis, driftHs, driftVs = [], [], [], [], [], []
-            fc_errors = []
-
-            for entry in entries:
-                parts = entry.split(',')
-                timestamp = int(parts[0])
-                gps_status = float(parts[1].strip().replace('gps=', ''))
-                battery = rssi = driftH = driftV = fc_error = None
-
-                for part in parts[2:]:
-                    if '=' in part:
-                        key, value = part.split('=')
-                        value = value.strip()
-                        if key == 'battery':
-                            battery = float(value)
-                        elif key == 'rssi':
-                            rssi = float(value) if value != 'None' else None
-                        elif key == 'driftH':
-                            driftH = float(value)
-                        elif key == 'driftV':
-                            driftV = float(value)
-                        elif key == 'fc_error':
-                            fc_error = int(value)
-
-                timestamps.append(timestamp)
-                gps_statuses.append(gps_status)
-                batteries.append(battery)
-                rssis.append(rssi)
-                driftHs.append(driftH)
-                driftVs.append(driftV)
-                if fc_error:
-                    fc_errors.append((timestamp, fc_error))
+    # Lecture ligne à ligne sur les octets, sans décodage UTF-8 du fichier entier
+    for line in block.split(b'\n'):
+        line = line.strip()
+        if line:
+            drone_id, data = line.split(b' ', 1)
+            drone_id = drone_id.split(b'=')[1].decode('utf-8')
+
+            entries = _parse_entries(data)
+            if entries is None:
+                continue
+            timestamps, metrics = entries
+            # Statut GPS obligatoire dans chaque entrée : sans lui la ligne est
+            # rejetée (NaN n'a pas de valeur entière définie en uint8)
+            if np.isnan(metrics[:, 0]).any():
+                continue
+            gps_statuses = metrics[:, 0].astype(np.uint8)
+            # Codes FC sur 16 bits : tout code au-delà de la table est ramené à
+            # 256 (inconnu) avant réduction, pas de repliement sur un code connu
+            fc_codes = np.minimum(np.nan_to_num(metrics[:, 5]), len(ERROR_LUT) - 1).astype(np.uint16)
+            has_error = fc_codes != 0
 
             drones_data[drone_id] = {
                 'timestamps': timestamps,
+                'ts_min': timestamps.min(),
+                'ts_max': timestamps.max(),
+                # Statut GPS entier (3 à 6)
                 'gps_statuses': gps_statuses,
-                'batteries': batteries,
-                'rssis': rssis,
-                'driftHs': driftHs,
-                'driftVs': driftVs,
-                'fc_errors': fc_errors
+                # Pour le résumé GPS : au moins un statut autre que 6 (RTK+)
+                'gps_non_six': bool((gps_statuses != 6).any()),
+                # Statut constant sur tout le log : drone non tracé pour le GPS
+                'gps_const': bool(np.ptp(gps_statuses) == 0),
+                # Colonnes contiguës : les filtres et le tracé parcourent des blocs continus
+                'batteries': np.ascontiguousarray(metrics[:, 1]),
+                'rssis': np.ascontiguousarray(metrics[:, 2]),
+                'driftHs': np.ascontiguousarray(metrics[:, 3]),
+                'driftVs': np.ascontiguousarray(metrics[:, 4]),
+                # Erreurs FC en tableaux parallèles (horodatage, code), code 0 exclu
+                'fc_ts': timestamps[has_error],
+                'fc_codes': fc_codes[has_error]
             }
 
+    return drones_data
+
+def _parse_content(payload):
+    drones_data = {}
+
+    # Blocs fusionnés dans l'ordre du fichier : un drone répété garde sa dernière ligne
+    for block in _iter_line_blocks(payload):
+        drones_data.update(_parse_block(block))
+
+    # Précalculs réutilisés à chaque callback : temps relatifs et extrema
+    # (fmin/fmax ignorent les NaN, un drone sans valeur donne NaN)
+    if drones_data:
+        min_timestamp = min(data['ts_min'] for data in drones_data.values())
+        for data in drones_data.values():
+            data['rel_ts'] = ((data['timestamps'] - min_timestamp) / 1000.0).astype(np.float32)
+            for metric, (stat, ufunc) in THRESHOLD_STATS.items():
+                data[f'{stat}_{metric}'] = ufunc.reduce(data[metric], initial=np.nan)
+
+    return drones_data
+
+# Nombre maximal de points envoyés au navigateur par drone et par vue
+MAX_POINTS_PER_DRONE = 1000
+
+# Sous-échantillonnage LTTB (Largest-Triangle-Three-Buckets) : premier et dernier
+# points conservés, puis dans chaque seau le point formant le plus grand triangle
+# avec le point retenu précédemment et la moyenne du seau suivant
+def _lttb_indices(x, y, n_out):
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # Calcul en flottants : le statut GPS est en uint8, où 3 - 6 vaudrait 253.
+    # Les NaN (valeurs manquantes) ne doivent pas guider la sélection
+    y = np.nan_to_num(y.astype(np.float64))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    edges = np.append(edges, n)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    # Tout ce qui ne dépend pas du point retenu est calculé d'un bloc : moyennes
+    # de tous les seaux, et points des seaux rangés en matrice (une ligne par seau,
+    # lignes courtes complétées en répétant leur dernier point, jamais préféré
+    # par argmax qui garde la première occurrence)
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x, edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y, edges[:-1]) / sizes
+    starts = edges[:-2]
+    columns = np.minimum(starts[:, None] + np.arange(sizes[:-1].max()), (edges[1:-1] - 1)[:, None])
+    bucket_x, bucket_y = x[columns], y[columns]
+
+    # Seule la sélection reste séquentielle : elle dépend du point précédent
+    a = 0
+    for i in range(n_out - 2):
+        ax, ay = x[a], y[a]
+        areas = np.abs(
+            (ax - avg_x[i + 1]) * (bucket_y[i] - ay) - (ax - bucket_x[i]) * (avg_y[i + 1] - ay)
+        )
+        a = starts[i] + int(areas.argmax())
+        indices[i + 1] = a
+
+    return indices
+
+# Drones candidats à l'affichage pour une métrique. Le filtre par seuil est
+# appliqué dans le navigateur (voir le callback clientside plus bas)
+def _metric_drones(drones_data, selected_metric):
+    metric_drones = sorted(drones_data.items())
+
+    if selected_metric == 'gps_statuses':
+        metric_drones = [(drone_id, data) for drone_id, data in metric_drones if not data['gps_const']]
+
+    return metric_drones
+
+# Tableau float32 au format "typed array" de plotly.js (base64)
+def _typed_array(values):
+    return {'dtype': 'f4', 'bdata': base64.b64encode(values.astype('<f4').tobytes()).decode('ascii')}
+
+# Données envoyées au navigateur pour le graphe d'une métrique : séries de tous
+# les drones candidats mises bout à bout, sous-échantillonnées sur la plage x_range
+# visible (tout le log si None), pour chaque drone [id, début, fin] et son extremum
+# afin que le navigateur filtre par seuil sans revenir au serveur
+def _metric_data(drones_data, selected_metric, x_range=None):
+    stat = THRESHOLD_STATS[selected_metric][0] if selected_metric in THRESHOLD_STATS else None
+    x_parts, y_parts, segments, extrema = [], [], [], []
+    offset = 0
+
+    for drone_id, data in _metric_drones(drones_data, selected_metric):
+        x, y = data['rel_ts'], data[selected_metric]
+        if x_range is not None:
+            # Un point de part et d'autre pour que la courbe sorte du cadre
+            start = max(np.searchsorted(x, x_range[0]) - 1, 0)
+            end = np.searchsorted(x, x_range[1]) + 1
+            x, y = x[start:end], y[start:end]
+
+        kept = _lttb_indices(x, y, MAX_POINTS_PER_DRONE)
+        x_parts.append(x[kept])
+        y_parts.append(y[kept])
+
+        segments.append([drone_id, offset, offset + len(kept)])
+        extrema.append(data[f'{stat}_{selected_metric}'] if stat else np.nan)
+        offset += len(kept)
+
+    empty = np.empty(0, dtype=np.float32)
+    return {
+        'x': _typed_array(np.concatenate(x_parts) if x_parts else empty),
+        'y': _typed_array(np.concatenate(y_parts) if y_parts else empty),
+        'segments': segments,
+        # En binaire, le NaN (drone sans valeur) survit au transport JSON
+        'extrema': _typed_array(np.array(extrema, dtype=np.float32)),
+        'stat': stat
+    }
+
 # Layout de l'app
 app.layout = html.Div([
     html.H1("Luminousbees Swarm Monitoring", style={"textAlign": "center"}),
@@ -118,10 +359,14 @@ app.layout = html.Div([
 
     html.Div(id='threshold-label', style={'textAlign': 'center', 'marginTop': '10px', 'fontWeight': 'bold'}),
     html.Div(
-        dcc.Input(id='threshold-input', type='number', value=0, step=0.1),
+        # debounce : mise à jour sur Entrée / perte de focus, pas à chaque frappe
+        dcc.Input(id='threshold-input', type='number', value=0, step=0.1, debounce=True),
         style={'textAlign': 'center', 'marginBottom': '20px'}
     ),
 
+    # Empreinte du fichier parsé : les données restent côté serveur, dans le cache
+    dcc.Store(id='parsed-store'),
+
     html.Div(id='main-output')
 ])
 
@@ -140,73 +385,100 @@ def update_threshold_visibility(metric):
     else:
         return "", {'display': 'none'}
 
+# Le parsing n'est déclenché que par un nouvel upload
 @app.callback(
-    Output('main-output', 'children'),
-    Input('upload-data', 'contents'),
-    Input('metric-selector', 'value'),
-    Input('threshold-input', 'value')
+    Output('parsed-store', 'data'),
+    Input('upload-data', 'contents')
 )
-def update_output(contents, selected_metric, threshold):
+def store_parsed_upload(contents):
+    # Upload vidé après une sortie du cache (voir _reset_upload) : on garde le message
     if not contents:
+        raise PreventUpdate
+
+    content_hash, drones_data = parse_uploaded_file(contents)
+    return content_hash.hex()
+
+# Fichier sorti du cache (autre session, autre worker) : l'upload est vidé pour
+# qu'un nouvel envoi du même fichier redéclenche le parsing
+def _reset_upload():
+    set_props('upload-data', {'contents': None})
+    return "Please upload the TXT file again."
+
+@app.callback(
+    Output('main-output', 'children'),
+    Input('parsed-store', 'data'),
+    Input('metric-selector', 'value')
+)
+def update_output(parsed_hash, selected_metric):
+    if not parsed_hash:
         return "Please upload a valid TXT file."
 
-    parse_uploaded_file(contents)
+    # Seule l'empreinte circule : le fichier n'est pas renvoyé à chaque interaction
+    drones_data = _cached_parse(bytes.fromhex(parsed_hash))
+    if drones_data is None:
+        return _reset_upload()
     if not drones_data:
-        return dcc.Graph(figure=go.Figure())
+        return dcc.Graph(figure=EMPTY_FIGURE)
 
-    min_timestamp = min(ts for data in drones_data.values() for ts in data['timestamps'])
+    min_timestamp = min(data['ts_min'] for data in drones_data.values())
 
     if selected_metric == 'fc_errors':
-        error_groups = defaultdict(list)
-
-        for drone_id, data in drones_data.items():
-            for ts, code in data.get('fc_errors', []):
-                if code in ERROR_CODES:
-                    error_groups[code].append((drone_id, ts))
+        # Toutes les erreurs de tous les drones à plat, puis un masque par code connu
+        all_codes = np.concatenate([data['fc_codes'] for data in drones_data.values()])
+        all_ts = np.concatenate([data['fc_ts'] for data in drones_data.values()])
+        all_drone_ids = np.concatenate([np.full(len(data['fc_codes']), drone_id) for drone_id, data in drones_data.items()])
+        known = ERROR_LUT.take(all_codes, mode='clip')
+
+        # Regroupement par code en une passe : tri stable (ordre du fichier conservé
+        # dans chaque groupe), puis découpage aux débuts de groupe
+        order = np.flatnonzero(known)[np.argsort(all_codes[known], kind='stable')]
+        error_codes, group_starts = np.unique(all_codes[order], return_index=True)
+        if not error_codes.size:
+            return dcc.Graph(figure=EMPTY_FIGURE)
+
+        # Un seul graphe (une instance Plotly) : une ligne par code d'erreur, axe des temps partagé
+        fig = make_subplots(
+            rows=len(error_codes),
+            cols=1,
+            shared_xaxes=True,
+            subplot_titles=[f"Error: {ERROR_CODES[code]} (code {code})" for code in error_codes]
+        )
+        affected_lines = []
 
-        graphs = []
-        for code, entries in sorted(error_groups.items()):
+        for row, (code, in_group) in enumerate(zip(error_codes, np.split(order, group_starts[1:])), start=1):
             error_name = ERROR_CODES[code]
-            fig = go.Figure()
-            affected_drones = set()
-
-            for drone_id, ts in entries:
-                relative_time = (ts - min_timestamp) / 1000.0
-                fig.add_trace(go.Scatter(
-                    x=[relative_time],
-                    y=[error_name],
-                    mode='markers+text',
-                    name=f'Drone {drone_id}',
-                    text=[drone_id],
-                    textposition='top center',
-                    marker=dict(size=10, symbol='x')
-                ))
-                affected_drones.add(drone_id)
-
-                fig.update_layout(
-                    title=f"Error: {error_name} (code {code})",
-                    xaxis=dict(
-                        title="Time (s)",
-                        range=[0, None]
-                    ),
-                    yaxis=dict(
-                        range=[0, None]
-                    ),
-                    template='plotly_white',
-                    height=400,
-                    margin=dict(t=60, b=40)
-                )
-
-
-            graphs.append(html.Div([
-                dcc.Graph(figure=fig),
-                html.P(f"Drones affected: {' '.join(sorted(affected_drones))}", style={"textAlign": "center", "fontWeight": "bold"})
-            ]))
-
-        return graphs if graphs else dcc.Graph(figure=go.Figure())
+            drone_ids = all_drone_ids[in_group]
+
+            # Une seule trace WebGL par code d'erreur, le drone est porté par le texte
+            fig.add_trace(go.Scattergl(
+                x=(all_ts[in_group] - min_timestamp) / 1000.0,
+                y=[error_name] * len(drone_ids),
+                mode='markers+text',
+                name=error_name,
+                text=drone_ids,
+                textposition='top center',
+                marker=dict(size=10, symbol='x'),
+                hovertemplate='Drone %{text}<br>%{x:.2f} s<extra></extra>'
+            ), row=row, col=1)
+
+            affected_lines.append(html.P(
+                f"{error_name} (code {code}) - Drones affected: {' '.join(np.unique(drone_ids))}",
+                style={"textAlign": "center", "fontWeight": "bold"}
+            ))
+
+        fig.update_xaxes(range=[0, None])
+        fig.update_xaxes(title="Time (s)", row=len(error_codes), col=1)
+        fig.update_yaxes(range=[0, None])
+        fig.update_layout(
+            template='plotly_white',
+            height=max(400, 250 * len(error_codes)),
+            showlegend=False,
+            margin=dict(t=60, b=40)
+        )
+
+        return html.Div([dcc.Graph(figure=fig)] + affected_lines)
 
     else:
-        fig = go.Figure()
         metric_label = {
             'gps_statuses': 'GPS Status',
             'batteries': 'Battery (dV)',
@@ -215,33 +487,6 @@ def update_output(contents, selected_metric, threshold):
             'driftVs': 'Vertical Drift (m)'
         }[selected_metric]
 
-        drones_displayed = 0
-
-        for drone_id, data in sorted(drones_data.items()):
-            y_values = data[selected_metric]
-            show_drone = True
-
-            if selected_metric in ['driftHs', 'driftVs']:
-                show_drone = any(v is not None and v > threshold for v in y_values)
-            elif selected_metric == 'batteries':
-                show_drone = any(v is not None and v < threshold for v in y_values)
-            elif selected_metric == 'rssis':
-                show_drone = any(v is not None and v > threshold for v in y_values)
-            elif selected_metric == 'gps_statuses':
-                show_drone = any(v != y_values[0] for v in y_values)
-
-            if not show_drone:
-                continue
-
-            relative_timestamps = [(ts - min_timestamp) / 1000.0 for ts in data['timestamps']]
-            fig.add_trace(go.Scatter(
-                x=relative_timestamps,
-                y=y_values,
-                mode='lines+markers',
-                name=f'Drone {drone_id}'
-            ))
-            drones_displayed += 1
-
         yaxis_config = dict(
             tickmode='array',
             tickvals=[3, 4, 5, 6],
@@ -253,22 +498,34 @@ def update_output(contents, selected_metric, threshold):
         if selected_metric == 'rssis':
             yaxis_config.update(range=[0, 100])
 
-        fig.update_layout(
-            title=metric_label,
-            xaxis_title='Time (s)',
-            yaxis_title=metric_label,
-            template='plotly_white',
-            height=900,
-            margin=dict(t=80, b=60),
-            yaxis=yaxis_config
-        )
+        yaxis_config.update(title=dict(text=metric_label))
+
+        fig = {
+            'data': [],
+            'layout': dict(
+                title=dict(text=metric_label),
+                xaxis=dict(title=dict(text='Time (s)')),
+                yaxis=yaxis_config,
+                template=PLOTLY_WHITE,
+                height=900,
+                margin=dict(t=80, b=60),
+                # Garde le zoom de l'utilisateur quand le navigateur remplace la trace
+                uirevision=selected_metric
+            )
+        }
+
+        # La trace est construite dans le navigateur à partir de metric-data
+        metric_graph = [
+            dcc.Graph(id='metric-graph', figure=fig),
+            dcc.Store(id='metric-data', data=_metric_data(drones_data, selected_metric))
+        ]
 
         if selected_metric == 'gps_statuses':
             total_drones = len(drones_data)
-            non_six_drones_ids = [drone_id for drone_id, data in drones_data.items() if any(status != 6 for status in data['gps_statuses'])]
+            non_six_drones_ids = [drone_id for drone_id, data in drones_data.items() if data['gps_non_six']]
             num_non_six_drones = len(non_six_drones_ids)
-            all_timestamps = [ts for data in drones_data.values() for ts in data['timestamps']]
-            total_duration_seconds = (max(all_timestamps) - min(all_timestamps)) / 1000 if all_timestamps else 0
+            max_timestamp = max(data['ts_max'] for data in drones_data.values())
+            total_duration_seconds = (max_timestamp - min_timestamp) / 1000
 
             summary = f"""Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Total number of drones: {total_drones}
@@ -276,12 +533,125 @@ Drones with GPS_STATUS different from 6: {num_non_six_drones}
 IDs of such drones: {', '.join(non_six_drones_ids)}
 Total log duration: {total_duration_seconds:.2f} seconds"""
 
-            return html.Div([
-                dcc.Graph(figure=fig),
+            return html.Div(metric_graph + [
                 html.Pre(summary, style={'whiteSpace': 'pre-wrap'})
             ])
 
-        return dcc.Graph(figure=fig)
+        return html.Div(metric_graph)
+
+# Zoom : seules les données de la plage visible sont ré-échantillonnées et renvoyées
+@app.callback(
+    Output('metric-data', 'data'),
+    Input('metric-graph', 'relayoutData'),
+    State('parsed-store', 'data'),
+    State('metric-selector', 'value'),
+    prevent_initial_call=True
+)
+def update_metric_data(relayout_data, parsed_hash, selected_metric):
+    if not parsed_hash or not relayout_data or selected_metric == 'fc_errors':
+        raise PreventUpdate
+
+    if 'xaxis.range[0]' in relayout_data:
+        x_range = (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+    elif 'xaxis.range' in relayout_data:
+        x_range = tuple(relayout_data['xaxis.range'])
+    elif relayout_data.get('xaxis.autorange'):
+        x_range = None
+    else:
+        # Pas de changement de l'axe des temps (autosize, zoom vertical...)
+        raise PreventUpdate
+
+    drones_data = _cached_parse(bytes.fromhex(parsed_hash))
+    if drones_data is None:
+        set_props('main-output', {'children': _reset_upload()})
+        return dash.no_update
+
+    return _metric_data(drones_data, selected_metric, x_range)
+
+# Filtre par seuil et construction de la trace dans le navigateur : changer le seuil
+# ne fait aucun aller-retour serveur. Tous les drones retenus sont mis dans une seule
+# trace, séparés par un NaN (coupure de ligne), l'identifiant porté par customdata.
+# Couleur des marqueurs par drone, prise dans le colorway du thème de la figure
+# (rang du drone dans l'ordre trié : un drone garde sa couleur quel que soit
+# le seuil), ligne commune en gris
+app.clientside_callback(
+    """
+    function(metricData, threshold, figure) {
+        if (!metricData || !figure) {
+            return window.dash_clientside.no_update;
+        }
+        if (metricData.stat && (threshold === null || threshold === undefined)) {
+            return window.dash_clientside.no_update;
+        }
+
+        const decode = function(spec) {
+            const raw = atob(spec.bdata);
+            const bytes = new Uint8Array(raw.length);
+            for (let i = 0; i < raw.length; i++) {
+                bytes[i] = raw.charCodeAt(i);
+            }
+            return new Float32Array(bytes.buffer);
+        };
+
+        // Seuil arrondi en float32 comme les données : 0.4 ne dépasse pas float32(0.4)
+        // Extremum NaN (aucune valeur) : la comparaison est fausse, le drone est masqué
+        const limit = Math.fround(threshold);
+        const extrema = decode(metricData.extrema);
+        const palette = figure.layout.template.layout.colorway;
+        const shown = metricData.segments.map(function(segment, index) {
+            return segment.concat([palette[index % palette.length]]);
+        }).filter(function(segment, index) {
+            if (metricData.stat === 'max') {
+                return extrema[index] > limit;
+            }
+            if (metricData.stat === 'min') {
+                return extrema[index] < limit;
+            }
+            return true;
+        });
+
+        const xs = decode(metricData.x);
+        const ys = decode(metricData.y);
+        let size = 0;
+        shown.forEach(function(segment) {
+            size += segment[2] - segment[1] + 1;
+        });
+
+        const x = new Float32Array(size);
+        const y = new Float32Array(size);
+        const droneIds = new Array(size);
+        const colors = new Array(size);
+        let position = 0;
+        shown.forEach(function(segment) {
+            const length = segment[2] - segment[1];
+            x.set(xs.subarray(segment[1], segment[2]), position);
+            y.set(ys.subarray(segment[1], segment[2]), position);
+            droneIds.fill(segment[0], position, position + length + 1);
+            colors.fill(segment[3], position, position + length + 1);
+            position += length;
+            x[position] = NaN;
+            y[position] = NaN;
+            position += 1;
+        });
+
+        const data = size ? [{
+            type: 'scattergl',
+            mode: 'lines+markers',
+            x: x,
+            y: y,
+            customdata: droneIds,
+            marker: {color: colors},
+            line: {color: '#b0b0b0', width: 1},
+            hovertemplate: 'Drone %{customdata}<br>%{x:.2f} s<br>%{y:.4~g}<extra></extra>'
+        }] : [];
+        return Object.assign({}, figure, {data: data});
+    }
+    """,
+    Output('metric-graph', 'figure'),
+    Input('metric-data', 'data'),
+    Input('threshold-input', 'value'),
+    State('metric-graph', 'figure')
+)
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 8050))